@@ -1,11 +1,22 @@
+import hashlib
 import os
 import pathlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import date
 import re
 
 import dash_table
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+
+import flask
+from flask_compress import Compress
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 
 import dash
 import dash_auth
@@ -24,17 +35,390 @@ VALID_USERNAME_PASSWORD_PAIRS = {
 app = dash.Dash(
     __name__,
     meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
+    compress=False,
 )
-auth = dash_auth.BasicAuth(
+server = app.server
+app.config["suppress_callback_exceptions"] = True
+
+
+# ========== server side sessions =============
+
+SESSION_COOKIE = "pick_tracker_session"
+SESSION_TTL = 12 * 60 * 60  # seconds, about one shift plus overtime
+SESSION_LIMIT = 256
+SESSION_RESULTS_LIMIT = 16
+
+# sessions live in this process, the Procfile keeps gunicorn to one worker so every request sees them
+server.secret_key = os.environ.get("SECRET_KEY") or secrets.token_bytes(32)
+SESSION_SIGNER = URLSafeTimedSerializer(server.secret_key, salt=SESSION_COOKIE)
+
+# {session id: {"seen": time, "filters": {}, "figs": {}, "temp": {}, "results": {selection: figs}}}
+# ordered by last use, so the oldest sessions are at the front, only touched with SESSIONS_LOCK held
+SESSIONS = OrderedDict()
+SESSIONS_LOCK = threading.Lock()
+
+
+def read_session_cookie():
+    token = flask.request.cookies.get(SESSION_COOKIE)
+    if token is None:
+        return None
+    try:
+        return SESSION_SIGNER.loads(token, max_age=SESSION_TTL)
+    except BadSignature:
+        return None
+
+
+def _expire_sessions(now):
+    # call with SESSIONS_LOCK held
+    while SESSIONS and now - next(iter(SESSIONS.values()))["seen"] > SESSION_TTL:
+        SESSIONS.popitem(last=False)
+
+
+def open_session():
+    session_id = secrets.token_urlsafe(16)
+    session = {"filters": init_value_setter_store(),
+               "figs": dict(INITIAL_FIGS),
+               "temp": dict(INITIAL_TEMP_FIGS),
+               "results": OrderedDict(),
+               "seen": time.time(),
+               }
+    with SESSIONS_LOCK:
+        _expire_sessions(session["seen"])
+        SESSIONS[session_id] = session
+        while len(SESSIONS) > SESSION_LIMIT:
+            SESSIONS.popitem(last=False)
+    return session_id
+
+
+def touch_session(session_id):
+    # Mark a session as just used, False once it has expired or been evicted
+    now = time.time()
+    with SESSIONS_LOCK:
+        _expire_sessions(now)
+        session = SESSIONS.get(session_id)
+        if session is None:
+            return False
+        session["seen"] = now
+        SESSIONS.move_to_end(session_id)
+    return True
+
+
+def get_session():
+    # SessionAuth has already checked the session exists and stored its id for this request
+    session_id = flask.g.session_id
+    with SESSIONS_LOCK:
+        return session_id, SESSIONS[session_id]
+
+
+def remember_result(session, selection, figs):
+    # call with SESSIONS_LOCK held, keeps the figures for reuse and makes them the pending set
+    results = session["results"]
+    results[selection] = figs
+    results.move_to_end(selection)
+    while len(results) > SESSION_RESULTS_LIMIT:
+        results.popitem(last=False)
+    session["temp"] = figs
+
+
+class SessionAuth(dash_auth.BasicAuth):
+    # Check the basic auth credentials once, then trust the signed session cookie
+
+    def is_authorized(self):
+        session_id = read_session_cookie()
+        if session_id is not None and touch_session(session_id):
+            flask.g.session_id = session_id
+            return True
+        # no cookie, or its session is gone, so the credentials are checked again
+        if not super().is_authorized():
+            return False
+        flask.g.session_id = open_session()
+        flask.g.new_session = True
+        return True
+
+
+auth = SessionAuth(
     app,
     VALID_USERNAME_PASSWORD_PAIRS
 )
 
-server = app.server
-app.config["suppress_callback_exceptions"] = True
+
+@server.after_request
+def set_session_cookie(response):
+    if flask.g.get("new_session"):
+        # the cookie stands in for the credentials, so it only travels over https
+        response.set_cookie(SESSION_COOKIE, SESSION_SIGNER.dumps(flask.g.session_id),
+                            max_age=SESSION_TTL, secure=True, httponly=True, samesite="Lax")
+    return response
+
 
 APP_PATH = str(pathlib.Path(__file__).parent.resolve())
-df = pd.read_csv(os.path.join(APP_PATH, os.path.join("data", "TEST_MOCK_DATA.csv")))
+
+
+# ========== response caching and compression =============
+
+ASSETS_PATH = os.path.join(APP_PATH, "assets")
+ASSET_MAX_AGE = 365 * 24 * 60 * 60  # one year, asset urls carry a version query
+
+# brotli first, gzip for clients without it, small responses are not worth compressing
+server.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+server.config["COMPRESS_MIN_SIZE"] = 1024
+server.config["COMPRESS_MIMETYPES"] = ["text/html", "text/css", "application/javascript", "application/json"]
+Compress(server)
+
+# {asset name: (mtime, content hash)}
+ASSET_HASHES = {}
+
+
+def asset_hash(name):
+    path = os.path.join(ASSETS_PATH, name)
+    mtime = os.path.getmtime(path)
+    cached = ASSET_HASHES.get(name)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = (mtime, hashlib.sha1(f.read()).hexdigest()[:16])
+        ASSET_HASHES[name] = cached
+    return cached[1]
+
+
+def asset_url(name):
+    # url that changes with the file contents, so browsers may keep it for a year
+    return app.get_asset_url(name) + "?v=" + asset_hash(name)
+
+
+def if_none_match_hashes():
+    # Flask-Compress sends the etag back as "<hash>:br" / "<hash>:gzip", compare on the bare hash
+    hashes = {}
+    for raw in flask.request.headers.get("If-None-Match", "").split(","):
+        raw = raw.strip()
+        tag = raw[2:] if raw.startswith("W/") else raw
+        if tag:
+            hashes[tag.strip('"').split(":")[0]] = raw
+    return hashes
+
+
+# registered after Compress so it runs first and hashes the uncompressed body
+@server.after_request
+def add_cache_headers(response):
+    request = flask.request
+    asset_prefix = app.get_asset_url("")
+    if response.status_code != 200 or not request.path.startswith(asset_prefix):
+        return response
+
+    name = os.path.normpath(request.path[len(asset_prefix):])
+    if name.startswith("..") or os.path.isabs(name) or not os.path.isfile(os.path.join(ASSETS_PATH, name)):
+        return response
+
+    etag = asset_hash(name)
+    response.set_etag(etag)
+    # send_file already marked the response public with a 12 hour Expires, replace both
+    response.cache_control.public = False
+    response.expires = None
+    if "v" in request.args or "m" in request.args:
+        # versioned url (?v= from asset_url, ?m= from dash's own css links), private as assets sit behind auth
+        response.cache_control.private = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+    else:
+        response.cache_control.max_age = None
+        response.cache_control.no_cache = True
+
+    matched = if_none_match_hashes().get(etag)
+    if matched is not None:
+        # 304 is not compressed, so echo back the etag exactly as the browser cached it
+        not_modified = server.response_class(status=304)
+        not_modified.headers["ETag"] = matched
+        not_modified.headers["Cache-Control"] = response.headers["Cache-Control"]
+        return not_modified
+    return response
+
+
+# ========== weight classes =============
+
+# upper bound in pounds of each weight group, the last group is open ended
+WEIGHT_BINS = (-np.inf, 1, 5, 10, 20, 40, 100, np.inf)
+WEIGHT_CLASSES = ("0-1", "2-5", "6-10", "11-20", "21-40", "41-100", "100+")
+WEIGHT_COLORS = {"0-1": 'lightcyan', "2-5": 'cyan', "6-10": 'royalblue', "11-20": 'darkblue', "21-40": "yellow",
+                 "41-100": "red", "100+": "darkred", 'NO DATA': 'black'}
+
+
+def add_weight_class(frame):
+    # Bin raw WEIGHT once at ingest so the WEIGHT views group on a handful of codes
+    classes = pd.cut(frame["WEIGHT"], bins=WEIGHT_BINS, labels=WEIGHT_CLASSES)
+    # picks without a weight keep their own slice instead of dropping out of the WEIGHT views
+    frame["WEIGHT_CLASS"] = classes.cat.add_categories("NO DATA").fillna("NO DATA")
+    return frame
+
+
+df = add_weight_class(pd.read_csv(os.path.join(APP_PATH, os.path.join("data", "TEST_MOCK_DATA.csv"))))
+# the date picker hands back strings, convert once here instead of in every callback
+df["date"] = df["date"].astype(str)
+
+
+# ========== materialized trend rollups =============
+
+# shift start hours, a pick belongs to the last shift that started at or before its hour
+SHIFTS = ((6, "1ST"), (14, "2ND"), (22, "3RD"))
+TREND_DIMENSIONS = {"USER": "USER", "ZONE": "from_zone"}
+# trend shown before the user picks one, matching the initial all-picks pie and bar
+DEFAULT_TREND = "ZONE"
+# only offered once the pick export carries a department column
+if "DEPARTMENT" in df.columns:
+    TREND_DIMENSIONS["DEPARTMENT"] = "DEPARTMENT"
+TREND_WEEKS = 52
+TREND_SHIFT_DAYS = 14
+
+# bumped on every append so cached session results are not reused across data changes
+DATA_VERSION = 0
+# callbacks run on several threads, hold this while appending or reading df and the rollups
+DATA_LOCK = threading.Lock()
+
+# {(column, value): {week_start: [picks, qty, hours]}}
+WEEKLY_ROLLUP = {}
+# {(column, value): {(shift start date, shift): [picks, qty, hours]}}
+SHIFT_ROLLUP = {}
+# calendar dates already folded in, worked hours would double count if a date came in twice
+ROLLED_UP_DATES = set()
+
+
+def shift_of_hour(hour):
+    label = SHIFTS[-1][1]
+    for start, name in SHIFTS:
+        if hour >= start:
+            label = name
+    return label
+
+
+def _fold_into(rollup, column, grouped, period):
+    # add picks / qty / worked hours onto the stored totals, one entry per group
+    for row in grouped.itertuples(index=False):
+        key = tuple(getattr(row, p) for p in period) if len(period) > 1 else getattr(row, period[0])
+        totals = rollup.setdefault((column, row.key), {}).setdefault(key, [0, 0, 0])
+        totals[0] += int(row.picks)
+        totals[1] += int(row.qty)
+        totals[2] += int(row.hours)
+
+
+def rollup_day(day_df):
+    # Fold one day's picks into the weekly and shift rollups, history is never re-read
+    day = pd.to_datetime(day_df["date"].astype(str))
+    dates = set(day.dt.strftime("%Y-%m-%d"))
+    repeated = dates & ROLLED_UP_DATES
+    if repeated:
+        raise ValueError("picks for %s are already rolled up" % ", ".join(sorted(repeated)))
+
+    # hours before the first shift start belong to the night shift that began the day before
+    early = (day_df["time"] < SHIFTS[0][0]).astype(int)
+    shift_day = day - pd.to_timedelta(early, unit="D")
+
+    frame = pd.DataFrame({
+        "user": day_df["USER"].astype(str),
+        "date": day.dt.strftime("%Y-%m-%d"),
+        # weeks follow the shift date too, so both rollups put a night shift in the same period
+        "week": (shift_day - pd.to_timedelta(shift_day.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d"),
+        "shift_date": shift_day.dt.strftime("%Y-%m-%d"),
+        "shift": day_df["time"].map(shift_of_hour),
+        "hour": day_df["time"],
+        "qty": day_df["qty"],
+    })
+
+    for column in TREND_DIMENSIONS.values():
+        if column not in day_df.columns:
+            continue
+        frame["key"] = day_df[column].astype(str)
+
+        # one row per picker per worked hour, so counting rows below gives picker-hours
+        hourly = frame.groupby(["key", "user", "week", "date", "shift_date", "shift", "hour"]).agg(
+            picks=("qty", "size"), qty=("qty", "sum")).reset_index()
+
+        for period, rollup in ((["week"], WEEKLY_ROLLUP), (["shift_date", "shift"], SHIFT_ROLLUP)):
+            grouped = hourly.groupby(["key"] + period).agg(
+                picks=("picks", "sum"), qty=("qty", "sum"), hours=("hour", "size")).reset_index()
+            _fold_into(rollup, column, grouped, period)
+
+    ROLLED_UP_DATES.update(dates)
+
+
+def append_picks(day_df):
+    # Append a day's picks to the raw data and update the rollups incrementally
+    global df, DATA_VERSION
+    day_df = add_weight_class(day_df.copy())
+    day_df["date"] = day_df["date"].astype(str)
+    with DATA_LOCK:
+        rollup_day(day_df)
+        df = pd.concat([df, day_df], ignore_index=True)
+        DATA_VERSION += 1
+
+
+def _pph(totals):
+    picks, qty, hours = totals
+    return round(picks / hours, 2) if hours else 0
+
+
+def weekly_trend(column, value, end_date, weeks=TREND_WEEKS):
+    # one lookup per week ending with the week of end_date
+    table = WEEKLY_ROLLUP.get((column, str(value)), {})
+    end = pd.Timestamp(end_date)
+    end = end - pd.Timedelta(days=end.weekday())
+    rows = []
+    for n in range(weeks - 1, -1, -1):
+        week = (end - pd.Timedelta(weeks=n)).strftime("%Y-%m-%d")
+        totals = table.get(week, (0, 0, 0))
+        rows.append({"WEEK": week, "PPH": _pph(totals), "qty": totals[1], "KEY": str(value)})
+    return rows
+
+
+def shift_trend(column, value, end_date, days=TREND_SHIFT_DAYS):
+    # one lookup per shift over the days ending with end_date, keyed by the day the shift started
+    table = SHIFT_ROLLUP.get((column, str(value)), {})
+    end = pd.Timestamp(end_date)
+    rows = []
+    for n in range(days - 1, -1, -1):
+        day = (end - pd.Timedelta(days=n)).strftime("%Y-%m-%d")
+        for _, shift in SHIFTS:
+            totals = table.get((day, shift), (0, 0, 0))
+            rows.append({"SHIFT": day + " " + shift, "PPH": _pph(totals), "qty": totals[1], "KEY": str(value)})
+    return rows
+
+
+def build_trend_figs(trend, dep, user, end_date):
+    if trend not in TREND_DIMENSIONS:
+        trend = "USER"
+    column = TREND_DIMENSIONS[trend]
+
+    week_rows = []
+    shift_rows = []
+    with DATA_LOCK:
+        if not end_date:
+            end_date = df["date"].max()
+        if trend == "USER":
+            keys = [user]
+        elif trend == "DEPARTMENT":
+            keys = [dep]
+        else:
+            keys = sorted(k[1] for k in WEEKLY_ROLLUP if k[0] == column)
+
+        for key in keys:
+            week_rows += weekly_trend(column, key, end_date)
+            shift_rows += shift_trend(column, key, end_date)
+
+    w_fig = px.line(pd.DataFrame(week_rows, columns=["WEEK", "PPH", "qty", "KEY"]),
+                    x="WEEK",
+                    y="PPH",
+                    title="WEEK OVER WEEK PPH",
+                    color="KEY",
+                    hover_data=["qty"],
+                    )
+    s_fig = px.line(pd.DataFrame(shift_rows, columns=["SHIFT", "PPH", "qty", "KEY"]),
+                    x="SHIFT",
+                    y="PPH",
+                    title="SHIFT OVER SHIFT PPH",
+                    color="KEY",
+                    hover_data=["qty"],
+                    )
+    return w_fig, s_fig
+
+
+for _, day_picks in df.groupby("date"):
+    rollup_day(day_picks)
 
 
 # ========== initialize save data =============
@@ -47,6 +431,7 @@ def init_value_setter_store():
                   "Department": "NONE",
                   "User": "0000",
                   "Type": "NONE",
+                  "Trend": DEFAULT_TREND,
                   "Pass or Fail": "assets/smile.png",
                   }
     return state_dict
@@ -69,9 +454,13 @@ def init_chart_figs_store():
                    color="SKU"
                    )
 
+    w_fig, s_fig = build_trend_figs(DEFAULT_TREND, None, None, df["date"].max())
+
     # Initialize chart figs
     state_dict = {"CHART_FIGURE": c_fig,
-                  "GRAPH_FIGURE": g_fig, }
+                  "GRAPH_FIGURE": g_fig,
+                  "WEEK_TREND_FIGURE": w_fig,
+                  "SHIFT_TREND_FIGURE": s_fig, }
     return state_dict
 
 
@@ -91,12 +480,21 @@ def init_temp_figs_store():
                    color="SKU"
                    )
 
+    w_fig, s_fig = build_trend_figs(DEFAULT_TREND, None, None, df["date"].max())
+
     # Initialize temp figs
     state_dict = {"CHART_FIGURE": c_fig,
-                  "GRAPH_FIGURE": g_fig, }
+                  "GRAPH_FIGURE": g_fig,
+                  "WEEK_TREND_FIGURE": w_fig,
+                  "SHIFT_TREND_FIGURE": s_fig, }
     return state_dict
 
 
+# figures a new session starts from, built once rather than per session
+INITIAL_FIGS = init_chart_figs_store()
+INITIAL_TEMP_FIGS = init_temp_figs_store()
+
+
 # ========== build tabs function =============
 
 
@@ -118,7 +516,7 @@ def build_banner():
                     html.Button(
                         id="learn-more-button", children="LEARN MORE", n_clicks=0
                     ),
-                    html.Img(id="logo", src=app.get_asset_url("epson-logo.png")),
+                    html.Img(id="logo", src=asset_url("epson-logo.png")),
                 ],
             ),
         ],
@@ -163,6 +561,7 @@ def build_tab_1():
     departments = ("BRANDED", "E-STORE", "LTL")
     users = ("EAI111", "EAI222", "EAI333")
     types = ("UOM", "SKU", "WEIGHT")
+    trends = tuple(TREND_DIMENSIONS)
     return [
         # Manually select metrics
         html.Div(
@@ -217,6 +616,18 @@ def build_tab_1():
                                             "align-content": "center",
                                             "color": "#003F98", },
                                      ),
+                        dcc.Dropdown(id="trend-select",
+                                     options=list(
+                                         {"label": trend, "value": trend} for trend in trends
+
+                                     ),
+                                     value=DEFAULT_TREND,
+                                     multi=False,
+                                     placeholder="Select a Trend",
+                                     style={'width': "100%",
+                                            "align-content": "center",
+                                            "color": "#003F98", },
+                                     ),
 
                         dcc.DatePickerSingle(
                             id="my-date-picker-single",
@@ -294,7 +705,7 @@ def generate_modal():
 
                         2). Product type (ink, printer, projector, paper)
 
-                        3). Weight group (0-1pound, 2-5pound, 6-10pound, 11-20pound, 21-40pound, 40-100pound, 100+pound) 
+                        3). Weight group (0-1pound, 2-5pound, 6-10pound, 11-20pound, 21-40pound, 41-100pound, 100+pound) 
 
                         4). Time window (select to-from calendar dates)
 
@@ -417,7 +828,7 @@ def build_top_panel(stopped_interval, c_fig):
 
 # ======== build out bottom chart area ==========
 
-def build_chart_panel(g_fig):
+def build_chart_panel(g_fig, w_fig, s_fig):
     return html.Div(
         id="control-chart-container",
         className="twelve columns",
@@ -427,6 +838,14 @@ def build_chart_panel(g_fig):
                 id="bar-graph",
                 figure=g_fig,
             ),
+            dcc.Graph(
+                id="week-trend-graph",
+                figure=w_fig,
+            ),
+            dcc.Graph(
+                id="shift-trend-graph",
+                figure=s_fig,
+            ),
         ],
     )
 
@@ -451,10 +870,11 @@ app.layout = html.Div(
                 html.Div(id="app-content"),
             ],
         ),
-        dcc.Store(id="value-setter-store", data=(init_value_setter_store())),
+        # the stores only carry the session id, filters and figures stay on the server
+        dcc.Store(id="value-setter-store", data={"session": None, "rev": 0}),
         dcc.Store(id="n-interval-stage", data=50),
-        dcc.Store(id="figs-store", data=(init_chart_figs_store())),
-        dcc.Store(id="figs-temp", data=(init_temp_figs_store())),
+        dcc.Store(id="figs-store", data={"session": None, "rev": 0}),
+        dcc.Store(id="figs-temp", data={"session": None, "rev": 0}),
         generate_modal(),
     ],
 )
@@ -469,10 +889,15 @@ app.layout = html.Div(
     [Input("app-tabs", "value"), Input("value-setter-store", "data"), Input("figs-store", "data")],
     [State("n-interval-stage", "data")],
 )
-def render_tab_content(tab_switch, data, figs, stopped_interval):
+def render_tab_content(tab_switch, data_token, figs_token, stopped_interval):
     if tab_switch == "tab1":
         return build_tab_1(), stopped_interval
 
+    session_id, session = get_session()
+    with SESSIONS_LOCK:
+        data = dict(session["filters"])
+        figs = session["figs"]
+
     t_rate = data["Rate_Total"]
     cal = data["Date"]
     dep = data["Department"]
@@ -482,6 +907,8 @@ def render_tab_content(tab_switch, data, figs, stopped_interval):
 
     c_fig = figs["CHART_FIGURE"]
     g_fig = figs["GRAPH_FIGURE"]
+    w_fig = figs["WEEK_TREND_FIGURE"]
+    s_fig = figs["SHIFT_TREND_FIGURE"]
 
     return (
         html.Div(
@@ -490,7 +917,7 @@ def render_tab_content(tab_switch, data, figs, stopped_interval):
                 build_quick_stats_panel(cal, dep, user_n, t_rate, p_f),
                 html.Div(
                     id="graphs-container",
-                    children=[build_top_panel(stopped_interval, c_fig), build_chart_panel(g_fig)],
+                    children=[build_top_panel(stopped_interval, c_fig), build_chart_panel(g_fig, w_fig, s_fig)],
                 ),
             ],
         ),
@@ -542,14 +969,27 @@ def update_click_output(button_click, close_click):
         Input("dept-select", "value"),
         Input("user-select", "value"),
         Input("type-pick", "value"),
-        Input('my-date-picker-single', 'date')
+        Input('my-date-picker-single', 'date'),
+        Input("trend-select", "value"),
     ],
-    [State("figs-store", "data")]
 )
-def settings_changes(department_value, user_value, type_value, date_value, figs, ):
-    df['date'] = df['date'].astype(str)
-    df_df = df.loc[df["date"] == date_value]
-    udf_df = df_df.loc[df["USER"] == user_value]
+def settings_changes(department_value, user_value, type_value, date_value, trend_value):
+    session_id, session = get_session()
+    with DATA_LOCK:
+        picks = df
+        version = DATA_VERSION
+
+    # repeat views of a selection reuse the figures built the first time
+    selection = (department_value, user_value, type_value, date_value, trend_value, version)
+    with SESSIONS_LOCK:
+        figs = session["results"].get(selection)
+        if figs is not None:
+            remember_result(session, selection, figs)
+    if figs is not None:
+        return {"session": session_id, "rev": version}
+
+    df_df = picks.loc[picks["date"] == date_value]
+    udf_df = df_df.loc[picks["USER"] == user_value]
     listy = []
     dicty = {}
 
@@ -563,10 +1003,10 @@ def settings_changes(department_value, user_value, type_value, date_value, figs,
     dict_zones_total_picks = {}
 
     for zone in dicty:
-        new_data = udf_df.loc[df["from_zone"] == zone]
+        new_data = udf_df.loc[picks["from_zone"] == zone]
         dict_zones_total_picks[zone] = new_data.shape[0]
 
-    tudf_df = udf_df.loc[df["SKU"] == type_value]
+    tudf_df = udf_df.loc[picks["SKU"] == type_value]
 
     a = department_value
     b = user_value
@@ -609,26 +1049,41 @@ def settings_changes(department_value, user_value, type_value, date_value, figs,
 
     elif c == "WEIGHT":
         pie_v = "qty"
-        pie_n = "WEIGHT"
-        pie_c = "WEIGHT"
-        grh_c = "WEIGHT"
-        cdm = {1: 'lightcyan', 5: 'cyan', 10: 'royalblue', 15: 'darkblue', 25: "yellow", 40: "lightred", 70: "red",
-               100: "darkred", 'NO DATA': 'black'}
+        pie_n = "WEIGHT_CLASS"
+        pie_c = "WEIGHT_CLASS"
+        grh_c = "WEIGHT_CLASS"
+        cdm = WEIGHT_COLORS
+
+    if udf_df.empty:
+        # plotly can not colour an empty frame, a selection without picks gets blank charts
+        fig_bar = go.Figure(layout={"title": "PICKS PER HOUR"})
+        fig_pie = go.Figure()
+    else:
+        # aggregate before plotting so each figure carries one row per group, not one per pick
+        bar_df = udf_df.groupby(["time1", grh_c], observed=True)["qty"].sum().reset_index()
+        pie_df = udf_df.groupby(pie_n, observed=True)[pie_v].sum().reset_index()
 
-    fig_bar = px.bar(udf_df,
-                   x="time1",
-                   y="qty",
-                   title="PICKS PER HOUR",
-                   color=grh_c
-                   )
+        fig_bar = px.bar(bar_df,
+                       x="time1",
+                       y="qty",
+                       title="PICKS PER HOUR",
+                       color=grh_c
+                       )
 
-    fig_pie = px.pie(udf_df, values=pie_v, names=pie_n, color=pie_c,
-                     color_discrete_map=cdm)
+        fig_pie = px.pie(pie_df, values=pie_v, names=pie_n, color=pie_c,
+                         color_discrete_map=cdm)
 
-    figs["CHART_FIGURE"] = fig_pie
-    figs["GRAPH_FIGURE"] = fig_bar
+    fig_week, fig_shift = build_trend_figs(trend_value, department_value, user_value, date_value)
 
-    return figs
+    figs = {"CHART_FIGURE": fig_pie,
+            "GRAPH_FIGURE": fig_bar,
+            "WEEK_TREND_FIGURE": fig_week,
+            "SHIFT_TREND_FIGURE": fig_shift, }
+
+    with SESSIONS_LOCK:
+        remember_result(session, selection, figs)
+
+    return {"session": session_id, "rev": version}
 
 
 # ====== Callbacks to update stored data via click =====
@@ -636,34 +1091,36 @@ def settings_changes(department_value, user_value, type_value, date_value, figs,
     Output("value-setter-store", "data"), Output("figs-store", "data"),
     [Input("value-setter-set-btn", "n_clicks")],
     [
-        State("value-setter-store", "data"),
-        State("figs-store", "data"),
-        State("figs-temp", "data"),
         State("my-date-picker-single", "date"),
         State("dept-select", "value"),
         State("user-select", "value"),
         State("type-pick", "value"),
+        State("trend-select", "value"),
     ],
 )
-def set_value_setter_store(set_btn, data, figs, t_figs, cal, dep, usr, typ):
+def set_value_setter_store(set_btn, cal, dep, usr, typ, trend):
+    session_id, session = get_session()
+    token = {"session": session_id, "rev": set_btn or 0}
     if set_btn is None:
-        return data, figs
+        return token, token
     else:
-        data["Date"] = cal
-        data["Department"] = dep
-        data["User"] = usr
-        data["Type"] = typ
-
         pass_or_fail = "assets/sad.png"
         if usr == "EAI111" or "EAI333":
             pass_or_fail = "assets/smile.png"
         print(pass_or_fail)
-        data["Pass or Fail"] = pass_or_fail
 
-        figs["CHART_FIGURE"] = (t_figs["CHART_FIGURE"])
-        figs["GRAPH_FIGURE"] = (t_figs["GRAPH_FIGURE"])
+        with SESSIONS_LOCK:
+            data = session["filters"]
+            data["Date"] = cal
+            data["Department"] = dep
+            data["User"] = usr
+            data["Type"] = typ
+            data["Trend"] = trend
+            data["Pass or Fail"] = pass_or_fail
+
+            session["figs"] = session["temp"]
 
-        return data, figs
+        return token, token
 
 
 @app.callback(
@@ -673,21 +1130,26 @@ def set_value_setter_store(set_btn, data, figs, t_figs, cal, dep, usr, typ):
         Input("value-setter-store", "data"),
     ],
 )
-def show_current_specs(n_clicks, store_data):
+def show_current_specs(n_clicks, store_token):
     print("yes button 2")
     if n_clicks > 0:
+        session_id, session = get_session()
+        with SESSIONS_LOCK:
+            store_data = dict(session["filters"])
         new_df_dict = {
             "Data Filters": [
                 "Current Date Selected",
                 "Current Department Selected",
                 "Current User Selected",
                 "Current Type Selected",
+                "Current Trend Selected",
             ],
             "Current Setup": [
                 store_data["Date"],
                 store_data["Department"],
                 store_data["User"],
                 store_data["Type"],
+                store_data["Trend"],
             ],
         }
         new_df = pd.DataFrame.from_dict(new_df_dict)
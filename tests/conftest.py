@@ -0,0 +1,37 @@
+import base64
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": "Basic " + base64.b64encode(b"HELLO:WORLD").decode()}
+
+
+@pytest.fixture
+def client():
+    import EPSON_PICK_TRACKER as tracker
+
+    test_client = tracker.server.test_client()
+    # the session cookie is marked secure, so talk https to get it sent back
+    test_client.environ_base["wsgi.url_scheme"] = "https"
+    return test_client
+
+
+@pytest.fixture
+def post_callback(client):
+    def post(output, inputs, headers=None):
+        component, prop = output.split(".")
+        return client.post("/_dash-update-component", headers=headers, json={
+            "output": output,
+            "outputs": {"id": component, "property": prop},
+            "inputs": [{"id": name.split(".")[0], "property": name.split(".")[1], "value": value}
+                       for name, value in inputs],
+            "changedPropIds": [inputs[0][0]],
+            "state": [],
+        })
+    return post
@@ -0,0 +1,55 @@
+import pytest
+
+import EPSON_PICK_TRACKER as tracker
+
+
+def asset_etag(name):
+    return '"%s"' % tracker.asset_hash(name)
+
+
+# Flask-Compress hands out the etag with the encoding appended, the browser sends that back
+@pytest.mark.parametrize("if_none_match", [
+    '"{hash}"',
+    '"{hash}:br"',
+    'W/"{hash}:gzip"',
+])
+def test_unchanged_asset_returns_not_modified(client, auth_headers, if_none_match):
+    sent = if_none_match.format(hash=tracker.asset_hash("fonts.css"))
+    response = client.get(tracker.app.get_asset_url("fonts.css"),
+                          headers=dict(auth_headers, **{"If-None-Match": sent}))
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == sent
+
+
+def test_changed_asset_is_sent_again(client, auth_headers):
+    response = client.get(tracker.app.get_asset_url("fonts.css"),
+                          headers=dict(auth_headers, **{"If-None-Match": '"stale:br"'}))
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == asset_etag("fonts.css")
+
+
+@pytest.mark.parametrize("url", [
+    tracker.asset_url("epson-logo.png"),
+    tracker.app.get_asset_url("fonts.css") + "?m=1",
+])
+def test_versioned_asset_is_cached_privately(client, auth_headers, url):
+    response = client.get(url, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.cache_control.private
+    assert not response.cache_control.public
+    assert response.cache_control.max_age == tracker.ASSET_MAX_AGE
+    assert "Expires" not in response.headers
+
+
+@pytest.mark.parametrize("query", ["", "?anything=1"])
+def test_unversioned_asset_is_revalidated(client, auth_headers, query):
+    response = client.get(tracker.app.get_asset_url("fonts.css") + query, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.cache_control.no_cache
+    assert not response.cache_control.public
+    assert response.cache_control.max_age is None
+    assert "Expires" not in response.headers
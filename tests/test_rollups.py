@@ -0,0 +1,64 @@
+import copy
+
+import pandas as pd
+import pytest
+
+import EPSON_PICK_TRACKER as tracker
+
+
+@pytest.fixture(autouse=True)
+def tracker_state(monkeypatch):
+    # appends below only touch copies, the module state is put back after each test
+    monkeypatch.setattr(tracker, "df", tracker.df.copy())
+    monkeypatch.setattr(tracker, "WEEKLY_ROLLUP", copy.deepcopy(tracker.WEEKLY_ROLLUP))
+    monkeypatch.setattr(tracker, "SHIFT_ROLLUP", copy.deepcopy(tracker.SHIFT_ROLLUP))
+    monkeypatch.setattr(tracker, "ROLLED_UP_DATES", set(tracker.ROLLED_UP_DATES))
+    monkeypatch.setattr(tracker, "DATA_VERSION", tracker.DATA_VERSION)
+
+
+def make_day(date, rows):
+    return pd.DataFrame(
+        [{"USER": user, "SKU": "INK", "time": hour, "date": date, "qty": qty, "UOM": "pc",
+          "from_zone": zone, "WEIGHT": 1, "time1": float(hour)} for user, hour, qty, zone in rows]
+    )
+
+
+def test_append_picks_updates_rollups():
+    version = tracker.DATA_VERSION
+    rows_before = len(tracker.df)
+
+    # 2021-03-01 is a Monday, hour 1 belongs to the Sunday night shift that started on 2021-02-28
+    tracker.append_picks(make_day("2021-03-01", [
+        ("EAI444", 1, 2, "zz"),
+        ("EAI444", 1, 3, "zz"),
+        ("EAI555", 1, 5, "zz"),
+        ("EAI444", 23, 4, "zz"),
+    ]))
+
+    assert len(tracker.df) == rows_before + 4
+    assert tracker.DATA_VERSION == version + 1
+
+    # the Sunday night shift stays in the week of 2021-02-22 in both rollups
+    user_weeks = tracker.WEEKLY_ROLLUP[("USER", "EAI444")]
+    assert user_weeks["2021-02-22"] == [2, 5, 1]
+    assert user_weeks["2021-03-01"] == [1, 4, 1]
+
+    user_shifts = tracker.SHIFT_ROLLUP[("USER", "EAI444")]
+    assert user_shifts[("2021-02-28", "3RD")] == [2, 5, 1]
+    assert user_shifts[("2021-03-01", "3RD")] == [1, 4, 1]
+
+    # zone hours count each picker on the clock, two pickers in hour 1 make two picker-hours
+    zone_shifts = tracker.SHIFT_ROLLUP[("from_zone", "zz")]
+    assert zone_shifts[("2021-02-28", "3RD")] == [3, 10, 2]
+    assert tracker.WEEKLY_ROLLUP[("from_zone", "zz")]["2021-02-22"] == [3, 10, 2]
+
+
+def test_append_picks_rejects_rolled_up_day():
+    tracker.append_picks(make_day("2021-03-08", [("EAI444", 7, 1, "zz")]))
+    rows_before = len(tracker.df)
+
+    with pytest.raises(ValueError):
+        tracker.append_picks(make_day("2021-03-08", [("EAI444", 8, 1, "zz")]))
+
+    assert len(tracker.df) == rows_before
+    assert tracker.WEEKLY_ROLLUP[("USER", "EAI444")]["2021-03-08"] == [1, 1, 1]
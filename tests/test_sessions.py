@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+
+import pytest
+
+import EPSON_PICK_TRACKER as tracker
+
+UOM_SELECTION = [
+    ("type-pick.value", "UOM"),
+    ("dept-select.value", "BRANDED"),
+    ("user-select.value", "EAI111"),
+    ("my-date-picker-single.date", "2021-02-14"),
+    ("trend-select.value", tracker.DEFAULT_TREND),
+]
+
+
+@pytest.fixture(autouse=True)
+def sessions(monkeypatch):
+    monkeypatch.setattr(tracker, "SESSIONS", OrderedDict())
+    return tracker.SESSIONS
+
+
+def login(client, auth_headers):
+    response = client.get("/", headers=auth_headers)
+    assert response.status_code == 200
+    return response
+
+
+def test_login_sets_secure_session_cookie(client, auth_headers):
+    cookie = login(client, auth_headers).headers["Set-Cookie"]
+
+    assert cookie.startswith(tracker.SESSION_COOKIE + "=")
+    assert "Secure" in cookie
+    assert "HttpOnly" in cookie
+
+
+def test_callback_needs_credentials_or_cookie(post_callback):
+    assert post_callback("figs-temp.data", UOM_SELECTION).status_code == 401
+
+
+def test_cookie_alone_authorizes_callbacks(client, auth_headers, post_callback, sessions):
+    login(client, auth_headers)
+    session_id = next(reversed(sessions))
+
+    response = post_callback("figs-temp.data", UOM_SELECTION)
+
+    assert response.status_code == 200
+    assert response.get_json()["response"]["figs-temp"]["data"]["session"] == session_id
+    assert "Set-Cookie" not in response.headers
+    assert list(sessions) == [session_id]
+
+
+def test_expired_session_falls_back_to_basic_auth(client, auth_headers, post_callback, sessions):
+    login(client, auth_headers)
+    old_id = next(reversed(sessions))
+    sessions[old_id]["seen"] = time.time() - tracker.SESSION_TTL - 1
+
+    assert post_callback("figs-temp.data", UOM_SELECTION).status_code == 401
+
+    response = post_callback("figs-temp.data", UOM_SELECTION, headers=auth_headers)
+    assert response.status_code == 200
+    assert "Set-Cookie" in response.headers
+    assert old_id not in sessions
+
+
+def test_evicted_session_falls_back_to_basic_auth(client, auth_headers, post_callback, sessions, monkeypatch):
+    monkeypatch.setattr(tracker, "SESSION_LIMIT", 1)
+    login(client, auth_headers)
+    old_id = next(reversed(sessions))
+
+    # another floor screen logs in and pushes the first session out
+    login(tracker.server.test_client(), auth_headers)
+    assert old_id not in sessions
+
+    assert post_callback("figs-temp.data", UOM_SELECTION).status_code == 401
+    assert post_callback("figs-temp.data", UOM_SELECTION, headers=auth_headers).status_code == 200
+
+
+def test_repeat_selection_reuses_figures(client, auth_headers, post_callback, sessions):
+    login(client, auth_headers)
+    session = sessions[next(reversed(sessions))]
+
+    post_callback("figs-temp.data", UOM_SELECTION)
+    first = session["temp"]
+    post_callback("figs-temp.data", UOM_SELECTION)
+
+    assert session["temp"] is first
+    assert len(session["results"]) == 1
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+import EPSON_PICK_TRACKER as tracker
+
+
+def test_missing_weight_gets_no_data_class():
+    frame = tracker.add_weight_class(pd.DataFrame({"WEIGHT": [1, 3, 100, 101, None]}))
+
+    assert list(frame["WEIGHT_CLASS"]) == ["0-1", "2-5", "41-100", "100+", "NO DATA"]
+
+
+# a date the picker allows but has no picks, a cleared user dropdown, and a cleared date
+@pytest.mark.parametrize("user, day", [
+    ("EAI111", "2021-03-07"),
+    (None, "2021-02-14"),
+    ("EAI111", None),
+])
+def test_empty_weight_selection_renders(post_callback, auth_headers, user, day):
+    response = post_callback("figs-temp.data", [
+        ("type-pick.value", "WEIGHT"),
+        ("dept-select.value", "BRANDED"),
+        ("user-select.value", user),
+        ("my-date-picker-single.date", day),
+        ("trend-select.value", tracker.DEFAULT_TREND),
+    ], headers=auth_headers)
+
+    assert response.status_code == 200